@@ -0,0 +1,27 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+♻️ GC TUNING - Congelar el heap de arranque
+============================================
+✅ gc.freeze() saca los objetos de vida larga de las colecciones gen-2
+✅ Se puede llamar varias veces: cada llamada congela lo creado desde la anterior
+"""
+
+import gc
+import logging
+
+logger = logging.getLogger(__name__)
+
+GC_THRESHOLDS = (50_000, 20, 20)
+
+def freeze_heap():
+    """
+    Congelar todos los objetos vivos (módulos, clientes, pools, caches)
+    
+    main.py lo llama tras importar el bot; el bot debe llamarlo otra vez
+    cuando initialize_bot() retorna, para congelar los objetos creados ahí
+    """
+    gc.collect()
+    gc.freeze()
+    gc.set_threshold(*GC_THRESHOLDS)
+    logger.debug("♻️ Heap congelado: %d objetos permanentes", gc.get_freeze_count())
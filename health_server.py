@@ -11,53 +11,75 @@
 import asyncio
 import logging
 import os
-from datetime import datetime
-from typing import Optional
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Callable, Dict, Optional, Tuple
+import orjson
 from fastapi import FastAPI
-from fastapi.responses import JSONResponse
+from fastapi.responses import Response
 import uvicorn
 
 logger = logging.getLogger(__name__)
 
+# orjson serializa datetime nativamente (sin .isoformat() manual)
+ORJSON_OPTIONS = orjson.OPT_NAIVE_UTC | orjson.OPT_UTC_Z
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
 # ═══════════════════════════════════════════════════════════════
 # ESTADO GLOBAL DEL BOT
 # ═══════════════════════════════════════════════════════════════
 
-bot_status = {
-    "running": False,
-    "started_at": datetime.now(),  # ✅ Marcar como iniciado INMEDIATAMENTE
-    "last_scan": None,
-    "total_scans": 0,
-    "open_positions": 0,
-    "total_signals": 0,
-    "total_trades": 0,
-    "wins": 0,
-    "losses": 0,
-    "win_rate": 0.0,
-    "total_pnl": 0.0,
-    "ml_enabled": False,
-    "mode": "starting"
-}
+@dataclass(slots=True)
+class BotStatus:
+    """Estado del bot (slots: acceso a atributos sin __dict__, orjson lo serializa nativo)"""
+    running: bool = False
+    started_at: datetime = field(default_factory=_utcnow)  # ✅ Marcar como iniciado INMEDIATAMENTE
+    last_scan: Optional[datetime] = None
+    total_scans: int = 0
+    open_positions: int = 0
+    total_signals: int = 0
+    total_trades: int = 0
+    wins: int = 0
+    losses: int = 0
+    win_rate: float = 0.0
+    total_pnl: float = 0.0
+    ml_enabled: bool = False
+    mode: str = "starting"
+
+bot_status = BotStatus()
+
+# Reloj monotónico para uptime (started_at queda solo para mostrar)
+_started_ns = time.monotonic_ns()
+
+# Contador de probes a /health (reemplaza el access log por request)
+health_probe_count = 0
+
+# Cache de payloads serializados: se invalida cuando bot_status cambia
+_status_version = 0
+_payload_cache: Dict[str, Tuple[int, bytes]] = {}
+
+def invalidate_payload_cache():
+    """Marcar bot_status como modificado (regenerar payloads en el próximo request)"""
+    global _status_version
+    _status_version += 1
 
 # ═══════════════════════════════════════════════════════════════
-# FASTAPI APP
+# PAYLOADS (compartidos por FastAPI y el servidor raw)
 # ═══════════════════════════════════════════════════════════════
 
-app = FastAPI(
-    title="Solana Trading Bot ML",
-    version="4.2",
-    docs_url=None,
-    redoc_url=None
-)
+def _uptime_seconds() -> int:
+    return (time.monotonic_ns() - _started_ns) // 1_000_000_000
 
-@app.get("/")
-async def root():
-    """Endpoint raíz"""
+def build_root_payload() -> dict:
     return {
         "message": "🚀 Solana Trading Bot ML",
         "version": "4.2",
         "status": "healthy",  # ✅ SIEMPRE healthy
-        "bot_status": bot_status["mode"],
+        "bot_status": bot_status.mode,
         "endpoints": {
             "health": "/health",
             "status": "/status",
@@ -66,86 +88,193 @@ async def root():
         }
     }
 
+def build_health_static_payload() -> dict:
+    """Parte de /health que solo cambia con update_bot_status"""
+    return {
+        "status": "healthy",  # ✅ Siempre healthy
+        "server": "online",
+        "bot_running": bot_status.running,
+        "last_scan": bot_status.last_scan,
+        "mode": bot_status.mode
+    }
+
+def build_status_payload() -> dict:
+    return {
+        "server": {
+            "status": "online",
+            "started_at": bot_status.started_at,
+            "uptime_seconds": _uptime_seconds(),
+            "health_probes": health_probe_count
+        },
+        "bot": {
+            "running": bot_status.running,
+            "mode": bot_status.mode,
+            "ml_enabled": bot_status.ml_enabled
+        },
+        "activity": {
+            "total_scans": bot_status.total_scans,
+            "total_signals": bot_status.total_signals,
+            "total_trades": bot_status.total_trades,
+            "open_positions": bot_status.open_positions,
+            "last_scan": bot_status.last_scan
+        },
+        "performance": {
+            "wins": bot_status.wins,
+            "losses": bot_status.losses,
+            "win_rate": round(bot_status.win_rate, 2),
+            "total_pnl_percent": round(bot_status.total_pnl, 2)
+        }
+    }
+
+def build_stats_payload() -> dict:
+    return {
+        "scans": bot_status.total_scans,
+        "signals": bot_status.total_signals,
+        "trades": bot_status.total_trades,
+        "positions": bot_status.open_positions,
+        "wins": bot_status.wins,
+        "losses": bot_status.losses,
+        "win_rate": round(bot_status.win_rate, 2),
+        "pnl": round(bot_status.total_pnl, 2),
+        "ml_enabled": bot_status.ml_enabled
+    }
+
+def build_ping_payload() -> dict:
+    return {
+        "ping": "pong",
+        "timestamp": _utcnow(),
+        "uptime": _uptime_seconds()
+    }
+
+def _cached(key: str, render: Callable[[], bytes]) -> bytes:
+    entry = _payload_cache.get(key)
+    if entry is None or entry[0] != _status_version:
+        entry = (_status_version, render())
+        _payload_cache[key] = entry
+    return entry[1]
+
+def _dumps(payload: dict) -> bytes:
+    return orjson.dumps(payload, option=ORJSON_OPTIONS)
+
+def render_root() -> bytes:
+    return _cached("root", lambda: _dumps(build_root_payload()))
+
+# Template de /health: ancho fijo para los dos campos dinámicos
+_UPTIME_WIDTH = 10  # Padding con espacios a la izquierda (JSON válido)
+_TIMESTAMP_FORMAT = "%Y-%m-%dT%H:%M:%S.%fZ"
+_TIMESTAMP_WIDTH = 27
+_health_template: Optional[Tuple[int, bytearray, int, int]] = None
+
+def _build_health_template() -> Tuple[bytearray, int, int]:
+    """Retorna (template, offset de uptime, offset de timestamp)"""
+    head = _dumps(build_health_static_payload())[:-1] + b',"uptime_seconds":'
+    middle = b',"timestamp":"'
+    template = bytearray(
+        head + b" " * _UPTIME_WIDTH + middle + b"0" * _TIMESTAMP_WIDTH + b'"}'
+    )
+    uptime_at = len(head)
+    return template, uptime_at, uptime_at + _UPTIME_WIDTH + len(middle)
+
+def render_health() -> bytes:
+    global health_probe_count, _health_template
+    health_probe_count += 1
+    if _health_template is None or _health_template[0] != _status_version:
+        _health_template = (_status_version, *_build_health_template())
+    _, template, uptime_at, timestamp_at = _health_template
+    # Solo se parchean los bytes de uptime y timestamp
+    template[uptime_at:uptime_at + _UPTIME_WIDTH] = b"%*d" % (_UPTIME_WIDTH, _uptime_seconds())
+    template[timestamp_at:timestamp_at + _TIMESTAMP_WIDTH] = (
+        _utcnow().strftime(_TIMESTAMP_FORMAT).encode()
+    )
+    return bytes(template)
+
+def render_status() -> bytes:
+    return _dumps(build_status_payload())
+
+def render_stats() -> bytes:
+    return _cached("stats", lambda: _dumps(build_stats_payload()))
+
+def render_ping() -> bytes:
+    return _dumps(build_ping_payload())
+
+# ═══════════════════════════════════════════════════════════════
+# FASTAPI APP
+# ═══════════════════════════════════════════════════════════════
+
+app = FastAPI(
+    title="Solana Trading Bot ML",
+    version="4.2",
+    docs_url=None,
+    redoc_url=None
+)
+
+def _json(body: bytes) -> Response:
+    return Response(content=body, media_type="application/json")
+
+# Handlers async a propósito: un `def` se despacha al threadpool de anyio
+# (más caro que una corrutina) y los render_* mutan caches compartidos
+
+@app.get("/")
+async def root():
+    """Endpoint raíz"""
+    return _json(render_root())
+
 @app.get("/health")
 async def health_check():
     """
     ✅ CRÍTICO: Siempre retorna 200 OK para Railway
     Railway reinicia el servicio si recibe != 200
     """
-    uptime_seconds = 0
-    if bot_status["started_at"]:
-        uptime_seconds = int((datetime.now() - bot_status["started_at"]).total_seconds())
-    
     # ✅ SIEMPRE retornar 200, incluso si el bot no ha empezado
-    return JSONResponse(
-        status_code=200,
-        content={
-            "status": "healthy",  # ✅ Siempre healthy
-            "server": "online",
-            "bot_running": bot_status["running"],
-            "uptime_seconds": uptime_seconds,
-            "last_scan": bot_status["last_scan"].isoformat() if bot_status["last_scan"] else None,
-            "mode": bot_status["mode"],
-            "timestamp": datetime.now().isoformat()
-        }
-    )
+    return _json(render_health())
 
 @app.get("/status")
 async def get_status():
     """Status detallado del bot"""
-    uptime_seconds = 0
-    if bot_status["started_at"]:
-        uptime_seconds = int((datetime.now() - bot_status["started_at"]).total_seconds())
-    
-    return JSONResponse({
-        "server": {
-            "status": "online",
-            "started_at": bot_status["started_at"].isoformat() if bot_status["started_at"] else None,
-            "uptime_seconds": uptime_seconds
-        },
-        "bot": {
-            "running": bot_status["running"],
-            "mode": bot_status["mode"],
-            "ml_enabled": bot_status["ml_enabled"]
-        },
-        "activity": {
-            "total_scans": bot_status["total_scans"],
-            "total_signals": bot_status["total_signals"],
-            "total_trades": bot_status["total_trades"],
-            "open_positions": bot_status["open_positions"],
-            "last_scan": bot_status["last_scan"].isoformat() if bot_status["last_scan"] else None
-        },
-        "performance": {
-            "wins": bot_status["wins"],
-            "losses": bot_status["losses"],
-            "win_rate": round(bot_status["win_rate"], 2),
-            "total_pnl_percent": round(bot_status["total_pnl"], 2)
-        }
-    })
+    return _json(render_status())
 
 @app.get("/stats")
 async def get_stats():
     """Estadísticas completas"""
-    return JSONResponse({
-        "scans": bot_status["total_scans"],
-        "signals": bot_status["total_signals"],
-        "trades": bot_status["total_trades"],
-        "positions": bot_status["open_positions"],
-        "wins": bot_status["wins"],
-        "losses": bot_status["losses"],
-        "win_rate": round(bot_status["win_rate"], 2),
-        "pnl": round(bot_status["total_pnl"], 2),
-        "ml_enabled": bot_status["ml_enabled"]
-    })
+    return _json(render_stats())
 
 @app.get("/ping")
 async def ping():
     """Ping simple"""
-    return {
-        "ping": "pong",
-        "timestamp": datetime.now().isoformat(),
-        "uptime": int((datetime.now() - bot_status["started_at"]).total_seconds()) if bot_status["started_at"] else 0
-    }
+    return _json(render_ping())
+
+# ═══════════════════════════════════════════════════════════════
+# FAST PATH ASGI (sin router de FastAPI)
+# ═══════════════════════════════════════════════════════════════
+
+FAST_ROUTES: Dict[str, Callable[[], bytes]] = {
+    "/ping": render_ping,
+}
+
+class FastPathMiddleware:
+    """Responde FAST_ROUTES directo en ASGI; el resto sigue a FastAPI"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and scope["method"] == "GET":
+            render = FAST_ROUTES.get(scope["path"])
+            if render is not None:
+                body = render()
+                await send({
+                    "type": "http.response.start",
+                    "status": 200,
+                    "headers": [
+                        (b"content-type", b"application/json"),
+                        (b"content-length", b"%d" % len(body)),
+                    ],
+                })
+                await send({"type": "http.response.body", "body": body})
+                return
+        await self.app(scope, receive, send)
+
+asgi_app = FastPathMiddleware(app)
 
 # ═══════════════════════════════════════════════════════════════
 # FUNCIONES DE ACTUALIZACIÓN
@@ -164,35 +293,37 @@ def update_bot_status(
     mode: Optional[str] = None
 ):
     """Actualizar estado del bot"""
-    bot_status["running"] = running
-    bot_status["total_scans"] = scans
-    bot_status["open_positions"] = positions
-    bot_status["last_scan"] = datetime.now()
+    bot_status.running = running
+    bot_status.total_scans = scans
+    bot_status.open_positions = positions
+    bot_status.last_scan = _utcnow()
     
     if signals is not None:
-        bot_status["total_signals"] = signals
+        bot_status.total_signals = signals
     
     if trades is not None:
-        bot_status["total_trades"] = trades
+        bot_status.total_trades = trades
     
     if wins is not None:
-        bot_status["wins"] = wins
+        bot_status.wins = wins
     
     if losses is not None:
-        bot_status["losses"] = losses
+        bot_status.losses = losses
     
     if wins is not None and losses is not None:
         total = wins + losses
-        bot_status["win_rate"] = (wins / total * 100) if total > 0 else 0.0
+        bot_status.win_rate = (wins / total * 100) if total > 0 else 0.0
     
     if total_pnl is not None:
-        bot_status["total_pnl"] = total_pnl
+        bot_status.total_pnl = total_pnl
     
     if ml_enabled is not None:
-        bot_status["ml_enabled"] = ml_enabled
+        bot_status.ml_enabled = ml_enabled
     
     if mode is not None:
-        bot_status["mode"] = mode
+        bot_status.mode = mode
+    
+    invalidate_payload_cache()
 
 # ═══════════════════════════════════════════════════════════════
 # SERVIDOR
@@ -202,21 +333,33 @@ async def start_health_server(port: Optional[int] = None):
     """
     ✅ Iniciar servidor HTTP INMEDIATAMENTE
     """
+    global _started_ns
+    
     try:
         # ✅ Usar PORT de Railway o 8080 por defecto
         if port is None:
             port = int(os.getenv('PORT', '8080'))
         
         # ✅ Marcar servidor como iniciado ANTES de uvicorn
-        bot_status["started_at"] = datetime.now()
-        bot_status["mode"] = "server_starting"
+        bot_status.started_at = _utcnow()
+        _started_ns = time.monotonic_ns()
+        bot_status.mode = "server_starting"
+        invalidate_payload_cache()
+        
+        # ⚡ Backend raw (asyncio puro) para probes de Railway
+        if os.getenv('HEALTH_SERVER_BACKEND', 'fastapi').lower() == 'raw':
+            from raw_health_server import serve_raw_health
+            await serve_raw_health(port)
+            return
         
         config = uvicorn.Config(
-            app,
+            asgi_app,
             host="0.0.0.0",
             port=port,
-            log_level="info",
-            access_log=True,
+            loop="uvloop",
+            http="httptools",
+            log_level="warning",
+            access_log=False,  # ⚡ Probes contados en health_probe_count
             timeout_keep_alive=75,  # ✅ Aumentar timeout
             limit_concurrency=100,
             backlog=2048
@@ -240,4 +383,5 @@ async def start_health_server(port: Optional[int] = None):
 async def startup_event():
     """Ejecutado cuando FastAPI inicia"""
     logger.info("🚀 FastAPI startup event - Health server READY")
-    bot_status["mode"] = "ready"
+    bot_status.mode = "ready"
+    invalidate_payload_cache()
@@ -0,0 +1,41 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+🌐 HTTP SESSION - aiohttp.ClientSession compartida por todo el proceso
+======================================================================
+✅ Un solo connector (keep-alive, cache DNS) para Jupiter, CoinGecko, etc.
+✅ Se crea al primer uso (necesita event loop)
+✅ close_http_session() al apagar el bot
+"""
+
+import logging
+from typing import Optional
+import aiohttp
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TIMEOUT = aiohttp.ClientTimeout(total=10)
+
+_session: Optional[aiohttp.ClientSession] = None
+
+def get_http_session() -> aiohttp.ClientSession:
+    """Obtener la sesión HTTP compartida (timeouts por request con timeout=...)"""
+    global _session
+    if _session is None or _session.closed:
+        _session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(
+                limit=128,
+                limit_per_host=64,
+                ttl_dns_cache=300,
+                keepalive_timeout=75
+            ),
+            timeout=DEFAULT_TIMEOUT
+        )
+    return _session
+
+async def close_http_session():
+    """Cerrar la sesión compartida (llamar una sola vez al apagar el bot)"""
+    global _session
+    if _session is not None and not _session.closed:
+        await _session.close()
+    _session = None
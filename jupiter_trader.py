@@ -7,19 +7,78 @@ Maneja quotes, swaps y ejecución de trades
 """
 
 import os
-import base64
+import asyncio
 import logging
-from typing import Optional, Dict
-import aiohttp
+import time
+from collections import OrderedDict
+from typing import Optional, Dict, Tuple
+import orjson
+try:
+    from pybase64 import b64decode  # ⚡ Decode SIMD
+except ImportError:
+    from base64 import b64decode
 from solders.keypair import Keypair
 from solders.transaction import VersionedTransaction
-from solana.rpc.async_api import AsyncClient
 from solana.rpc.types import TxOpts
 from solana.rpc.commitment import Confirmed
+from http_session import DEFAULT_TIMEOUT, get_http_session
 from rpc_pool import RPCPool
 
 logger = logging.getLogger(__name__)
 
+JSON_HEADERS = {"Content-Type": "application/json"}
+MAX_OPEN_REQUESTS = 32  # Tope de sockets simultáneos hacia Jupiter
+QUOTE_CACHE_TTL = 0.5  # Segundos que un quote se considera fresco
+QUOTE_CACHE_MAX = 512
+
+class JupiterAdmission:
+    """
+    Límite de requests concurrentes a Jupiter, redimensionable en caliente
+    (Condition + contador explícito en vez de tocar el contador interno de un Semaphore)
+    """
+    
+    def __init__(self, max_concurrent: int):
+        self._cv = asyncio.Condition()
+        self._active = 0
+        self._max = self._clamp(max_concurrent)
+    
+    @staticmethod
+    def _clamp(max_concurrent: int) -> int:
+        """Límite válido: al menos 1 y nunca más que MAX_OPEN_REQUESTS"""
+        return max(1, min(max_concurrent, MAX_OPEN_REQUESTS))
+    
+    @property
+    def max_concurrent(self) -> int:
+        return self._max
+    
+    async def acquire(self):
+        async with self._cv:
+            await self._cv.wait_for(lambda: self._active < self._max)
+            self._active += 1
+    
+    async def release(self):
+        # El slot se libera antes de cualquier await: una cancelación no puede perderlo
+        self._active -= 1
+        # notify() necesita el lock; shield para que el despertar ocurra igual si nos cancelan
+        await asyncio.shield(self._notify())
+    
+    async def _notify(self):
+        async with self._cv:
+            self._cv.notify()
+    
+    async def set_max(self, max_concurrent: int):
+        """Cambiar el límite (p.ej. si Jupiter reporta un rate limit menor)"""
+        async with self._cv:
+            self._max = self._clamp(max_concurrent)
+            self._cv.notify_all()
+    
+    async def __aenter__(self):
+        await self.acquire()
+        return self
+    
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.release()
+
 class JupiterTrader:
     """Cliente para Jupiter V6 Swap API"""
     
@@ -38,11 +97,34 @@ class JupiterTrader:
         # SOL mint
         self.SOL_MINT = "So11111111111111111111111111111111111111112"
         
+        # URL de quote pre-armada para el caso común (compra con SOL y monto por defecto)
+        self._default_amount = int(self.trade_amount_sol * 1_000_000_000)
+        self._buy_quote_prefix = (
+            f"{self.QUOTE_API}?inputMint={self.SOL_MINT}"
+            f"&amount={self._default_amount}"
+            f"&slippageBps={self.slippage_bps}"
+            f"&onlyDirectRoutes=false&asLegacyTransaction=false&outputMint="
+        )
+        
+        # Admisión de requests a Jupiter (rate limit), nunca por encima del tope
+        # duro de sockets abiertos (evita agotar file descriptors)
+        self.admission = JupiterAdmission(int(os.getenv('JUPITER_MAX_CONCURRENT', '16')))
+        
+        # Cache LRU de quotes: (input, output, amount, slippage) -> (ts, quote)
+        self._quote_cache: "OrderedDict[Tuple[str, str, int, int], Tuple[float, Dict]]" = OrderedDict()
+        
         logger.info(f"✅ Jupiter Trader inicializado")
         logger.info(f"   Wallet: {str(self.wallet.pubkey())[:8]}...")
         logger.info(f"   Amount: {self.trade_amount_sol} SOL")
         logger.info(f"   Slippage: {self.slippage_bps / 100}%")
     
+    async def close(self):
+        """
+        Liberar recursos propios (llamar al apagar el bot)
+        La sesión HTTP compartida la cierra main.py (close_http_session)
+        """
+        self._quote_cache.clear()
+    
     async def get_quote(
         self, 
         input_mint: str,
@@ -63,37 +145,54 @@ class JupiterTrader:
         try:
             if amount is None:
                 # Convertir SOL a lamports (1 SOL = 1,000,000,000 lamports)
-                amount = int(self.trade_amount_sol * 1_000_000_000)
+                amount = self._default_amount
             
-            params = {
-                "inputMint": input_mint,
-                "outputMint": output_mint,
-                "amount": str(amount),
-                "slippageBps": str(self.slippage_bps),
-                "onlyDirectRoutes": "false",
-                "asLegacyTransaction": "false"
-            }
+            cache_key = (input_mint, output_mint, amount, self.slippage_bps)
+            cached = self._quote_cache.get(cache_key)
+            if cached is not None:
+                if time.monotonic() - cached[0] < QUOTE_CACHE_TTL:
+                    self._quote_cache.move_to_end(cache_key)
+                    logger.debug(f"📊 Quote desde cache: {output_mint[:8]}...")
+                    return cached[1]
+                del self._quote_cache[cache_key]
+            
+            if input_mint == self.SOL_MINT and amount == self._default_amount:
+                url, params = self._buy_quote_prefix + output_mint, None
+            else:
+                url = self.QUOTE_API
+                params = {
+                    "inputMint": input_mint,
+                    "outputMint": output_mint,
+                    "amount": str(amount),
+                    "slippageBps": str(self.slippage_bps),
+                    "onlyDirectRoutes": "false",
+                    "asLegacyTransaction": "false"
+                }
             
             logger.info(f"📊 Solicitando quote: {amount / 1e9:.4f} SOL -> {output_mint[:8]}...")
             
-            async with aiohttp.ClientSession() as session:
-                async with session.get(self.QUOTE_API, params=params, timeout=10) as resp:
-                    if resp.status != 200:
-                        text = await resp.text()
-                        logger.error(f"❌ Quote failed: {resp.status} - {text[:200]}")
-                        return None
-                    
-                    quote = await resp.json()
-                    
-                    # Extraer info útil
-                    out_amount = int(quote.get("outAmount", 0))
-                    price_impact = float(quote.get("priceImpactPct", 0))
-                    
-                    logger.info(f"✅ Quote recibido:")
-                    logger.info(f"   Out Amount: {out_amount:,} tokens")
-                    logger.info(f"   Price Impact: {price_impact:.2f}%")
-                    
-                    return quote
+            session = get_http_session()
+            async with self.admission, session.get(url, params=params, timeout=DEFAULT_TIMEOUT) as resp:
+                if resp.status != 200:
+                    text = await resp.text()
+                    logger.error(f"❌ Quote failed: {resp.status} - {text[:200]}")
+                    return None
+                
+                quote = orjson.loads(await resp.content.read())
+                
+                # Extraer info útil
+                out_amount = int(quote.get("outAmount", 0))
+                price_impact = float(quote.get("priceImpactPct", 0))
+                
+                logger.info(f"✅ Quote recibido:")
+                logger.info(f"   Out Amount: {out_amount:,} tokens")
+                logger.info(f"   Price Impact: {price_impact:.2f}%")
+                
+                self._quote_cache[cache_key] = (time.monotonic(), quote)
+                if len(self._quote_cache) > QUOTE_CACHE_MAX:
+                    self._quote_cache.popitem(last=False)
+                
+                return quote
         
         except Exception as e:
             logger.error(f"❌ Error getting quote: {e}")
@@ -119,26 +218,27 @@ class JupiterTrader:
             
             logger.info(f"🔄 Solicitando swap transaction...")
             
-            async with aiohttp.ClientSession() as session:
-                async with session.post(
-                    self.SWAP_API,
-                    json=payload,
-                    timeout=10
-                ) as resp:
-                    if resp.status not in [200, 201]:
-                        text = await resp.text()
-                        logger.error(f"❌ Swap request failed: {resp.status} - {text[:200]}")
-                        return None
-                    
-                    swap_response = await resp.json()
-                    swap_transaction = swap_response.get("swapTransaction")
-                    
-                    if not swap_transaction:
-                        logger.error("❌ No swapTransaction en respuesta")
-                        return None
-                    
-                    logger.info(f"✅ Swap transaction recibida ({len(swap_transaction)} chars)")
-                    return swap_transaction
+            session = get_http_session()
+            async with self.admission, session.post(
+                self.SWAP_API,
+                data=orjson.dumps(payload),
+                headers=JSON_HEADERS,
+                timeout=DEFAULT_TIMEOUT
+            ) as resp:
+                if resp.status not in [200, 201]:
+                    text = await resp.text()
+                    logger.error(f"❌ Swap request failed: {resp.status} - {text[:200]}")
+                    return None
+                
+                swap_response = orjson.loads(await resp.content.read())
+                swap_transaction = swap_response.get("swapTransaction")
+                
+                if not swap_transaction:
+                    logger.error("❌ No swapTransaction en respuesta")
+                    return None
+                
+                logger.info(f"✅ Swap transaction recibida ({len(swap_transaction)} chars)")
+                return swap_transaction
         
         except Exception as e:
             logger.error(f"❌ Error getting swap transaction: {e}")
@@ -162,6 +262,8 @@ class JupiterTrader:
         try:
             logger.info(f"{'🧪 [DRY RUN]' if dry_run else '💰 [REAL]'} Comprando {token_mint[:8]}...")
             
+            client = self.rpc_pool.get_client()
+            
             # 1. Obtener quote
             quote = await self.get_quote(
                 input_mint=self.SOL_MINT,
@@ -180,20 +282,17 @@ class JupiterTrader:
                 return None
             
             # 3. Deserializar y firmar
-            tx_bytes = base64.b64decode(swap_tx_b64)
+            tx_bytes = b64decode(swap_tx_b64)
             versioned_tx = VersionedTransaction.from_bytes(tx_bytes)
             
             # Firmar con nuestra wallet
             signed_tx = versioned_tx.sign([self.wallet])
             
             # 4. Ejecutar o simular
-            client = self.rpc_pool.get_client()
-            
             if dry_run:
                 # Modo simulación
                 logger.info("🧪 Simulando transacción...")
                 sim_result = await client.simulate_transaction(signed_tx)
-                await client.close()
                 
                 if sim_result.value.err:
                     logger.error(f"❌ Simulación falló: {sim_result.value.err}")
@@ -216,7 +315,6 @@ class JupiterTrader:
                         preflight_commitment=Confirmed
                     )
                 )
-                await client.close()
                 
                 logger.info(f"✅ Trade ejecutado: {tx_sig}")
                 return str(tx_sig)
@@ -245,6 +343,8 @@ class JupiterTrader:
         try:
             logger.info(f"{'🧪 [DRY RUN]' if dry_run else '💰 [REAL]'} Vendiendo {token_mint[:8]}...")
             
+            client = self.rpc_pool.get_client()
+            
             # 1. Obtener quote (ahora input es el token, output es SOL)
             quote = await self.get_quote(
                 input_mint=token_mint,
@@ -264,17 +364,14 @@ class JupiterTrader:
                 return None
             
             # 3. Deserializar y firmar
-            tx_bytes = base64.b64decode(swap_tx_b64)
+            tx_bytes = b64decode(swap_tx_b64)
             versioned_tx = VersionedTransaction.from_bytes(tx_bytes)
             signed_tx = versioned_tx.sign([self.wallet])
             
             # 4. Ejecutar o simular
-            client = self.rpc_pool.get_client()
-            
             if dry_run:
                 logger.info("🧪 Simulando venta...")
                 sim_result = await client.simulate_transaction(signed_tx)
-                await client.close()
                 
                 if sim_result.value.err:
                     logger.error(f"❌ Simulación de venta falló: {sim_result.value.err}")
@@ -290,7 +387,6 @@ class JupiterTrader:
                     signed_tx,
                     opts=TxOpts(skip_preflight=False, preflight_commitment=Confirmed)
                 )
-                await client.close()
                 
                 logger.info(f"✅ Venta ejecutada: {tx_sig}")
                 return str(tx_sig)
@@ -299,4 +395,3 @@ class JupiterTrader:
             logger.error(f"❌ Error ejecutando venta: {e}")
             return None
 
-import time
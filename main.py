@@ -9,18 +9,36 @@
 """
 
 import asyncio
+import atexit
 import logging
+import logging.handlers
+import queue
 import sys
 import os
 
+# ⚡ Logging no bloqueante: el loop solo encola, un thread escribe a disco/stdout
+_log_queue: queue.Queue = queue.Queue(-1)
+_log_formatter = logging.Formatter(
+    fmt='%(asctime)s [%(levelname)s] %(message)s',
+    datefmt='%Y-%m-%d %H:%M:%S'
+)
+_stream_handler = logging.StreamHandler(sys.stdout)
+_stream_handler.setFormatter(_log_formatter)
+_file_handler = logging.FileHandler('main.log')
+_file_handler.setFormatter(_log_formatter)
+_log_listener = logging.handlers.QueueListener(
+    _log_queue, _stream_handler, _file_handler, respect_handler_level=True
+)
+_log_listener.start()
+atexit.register(_log_listener.stop)
+
+# El QueueHandler solo resuelve el mensaje; el formato final lo aplica el listener
+_queue_handler = logging.handlers.QueueHandler(_log_queue)
+_queue_handler.setFormatter(logging.Formatter('%(message)s'))
+
 logging.basicConfig(
     level=logging.INFO,
-    format='%(asctime)s [%(levelname)s] %(message)s',
-    datefmt='%Y-%m-%d %H:%M:%S',
-    handlers=[
-        logging.StreamHandler(sys.stdout),
-        logging.FileHandler('main.log')
-    ]
+    handlers=[_queue_handler]
 )
 
 logger = logging.getLogger(__name__)
@@ -36,6 +54,7 @@ async def main():
         # ✅ Importar health server PRIMERO
         logger.info("🏥 Importando health server...")
         from health_server import start_health_server, update_bot_status
+        from gc_tuning import freeze_heap
         
         # ✅ Obtener puerto de Railway
         port = int(os.getenv('PORT', '8080'))
@@ -57,52 +76,67 @@ async def main():
         
         logger.info("✅ Health server configurado - iniciando servidor HTTP...")
         
-        # ✅ CRÍTICO: Iniciar health server EN BACKGROUND
-        health_task = asyncio.create_task(start_health_server(port=port))
+        try:
+            # ✅ TaskGroup: si una tarea falla, la otra se cancela (Railway reinicia limpio)
+            async with asyncio.TaskGroup() as tg:
+                # ✅ CRÍTICO: Iniciar health server EN BACKGROUND
+                tg.create_task(start_health_server(port=port), name="health_server")
+                
+                # ✅ Esperar 2 segundos para que el servidor esté listo
+                await asyncio.sleep(2)
+                logger.info("✅ Health server ONLINE - Railway debería recibir 200 OK")
+                
+                # ✅ Ahora SÍ importar y ejecutar el bot sniper
+                logger.info("🎯 Importando Raydium Sniper Bot...")
+                try:
+                    # Importar desde ambos archivos (part 1 y part 2 combinados)
+                    import raydium_sniper_bot as sniper_bot
+                    
+                except ImportError as e:
+                    logger.error(f"❌ Error importando sniper bot: {e}")
+                    logger.warning("⚠️ Health server sigue corriendo sin bot")
+                    
+                    # Actualizar estado
+                    update_bot_status(
+                        running=False,
+                        scans=0,
+                        positions=0,
+                        mode="error_import"
+                    )
+                    
+                    # Mantener health server vivo (el TaskGroup espera su tarea)
+                
+                else:
+                    logger.info("✅ Sniper bot importado")
+                    
+                    # Actualizar estado
+                    update_bot_status(
+                        running=True,
+                        scans=0,
+                        positions=0,
+                        mode="DRY_RUN" if os.getenv('DRY_RUN', 'true').lower() == 'true' else "REAL"
+                    )
+                    
+                    # ⚡ Congelar objetos de import (módulos, app): las colecciones gen-2
+                    # dejan de recorrerlos. Lo creado en initialize_bot() se congela
+                    # cuando el bot llama freeze_heap() al terminar su init
+                    freeze_heap()
+                    
+                    logger.info("🚀 Iniciando Sniper Bot...")
+                    
+                    # ✅ Ejecutar bot en paralelo con health server
+                    tg.create_task(sniper_bot.main(), name="sniper_bot")
         
-        # ✅ Esperar 2 segundos para que el servidor esté listo
-        await asyncio.sleep(2)
-        logger.info("✅ Health server ONLINE - Railway debería recibir 200 OK")
+        except* Exception as eg:
+            for exc in eg.exceptions:
+                logger.error(f"❌ Tarea terminó con error: {exc!r}", exc_info=exc)
+            # Salir con error para que Railway reinicie el servicio
+            sys.exit(1)
         
-        # ✅ Ahora SÍ importar y ejecutar el bot sniper
-        logger.info("🎯 Importando Raydium Sniper Bot...")
-        try:
-            # Importar desde ambos archivos (part 1 y part 2 combinados)
-            import raydium_sniper_bot as sniper_bot
-            
-            logger.info("✅ Sniper bot importado")
-            
-            # Actualizar estado
-            update_bot_status(
-                running=True,
-                scans=0,
-                positions=0,
-                mode="DRY_RUN" if os.getenv('DRY_RUN', 'true').lower() == 'true' else "REAL"
-            )
-            
-            logger.info("🚀 Iniciando Sniper Bot...")
-            
-            # ✅ Ejecutar bot en paralelo con health server
-            await asyncio.gather(
-                health_task,  # Ya está corriendo
-                sniper_bot.main(),  # Iniciar bot ahora
-                return_exceptions=True
-            )
-            
-        except ImportError as e:
-            logger.error(f"❌ Error importando sniper bot: {e}")
-            logger.warning("⚠️ Health server sigue corriendo sin bot")
-            
-            # Actualizar estado
-            update_bot_status(
-                running=False,
-                scans=0,
-                positions=0,
-                mode="error_import"
-            )
-            
-            # Mantener health server vivo
-            await health_task
+        finally:
+            # ✅ Cerrar la sesión HTTP compartida (Jupiter/CoinGecko) al terminar
+            from http_session import close_http_session
+            await close_http_session()
         
     except KeyboardInterrupt:
         logger.info("⏸️ Detenido por usuario")
@@ -127,6 +161,12 @@ async def main():
 
 if __name__ == "__main__":
     try:
+        # ⚡ uvloop para todo el proceso (uvicorn.Server.serve corre en este loop)
+        try:
+            import uvloop
+            asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+        except ImportError:
+            pass
         asyncio.run(main())
     except KeyboardInterrupt:
         logger.info("👋 Adiós")
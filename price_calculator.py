@@ -8,69 +8,100 @@ Calcula precios directamente de la blockchain sin APIs externas
 
 import asyncio
 import logging
+import os
+import struct
 import time
-from typing import Optional, Dict
+from collections import OrderedDict, namedtuple
+from typing import List, NamedTuple, Optional, Dict, Tuple
+import aiohttp
+import orjson
 from solders.pubkey import Pubkey
-from construct import Struct, Int64ul, Padding, Bytes
+from http_session import get_http_session
+from pubkeys import to_pubkey
 from rpc_pool import RPCPool
 
 logger = logging.getLogger(__name__)
 
-# Layout del Pool State V4 de Raydium (estructura de datos)
-RAYDIUM_POOL_V4_LAYOUT = Struct(
-    "status" / Int64ul,
-    "nonce" / Int64ul,
-    "max_order" / Int64ul,
-    "depth" / Int64ul,
-    "base_decimal" / Int64ul,
-    "quote_decimal" / Int64ul,
-    "state" / Int64ul,
-    "reset_flag" / Int64ul,
-    "min_size" / Int64ul,
-    "vol_max_cut_ratio" / Int64ul,
-    "amount_wave_ratio" / Int64ul,
-    "base_lot_size" / Int64ul,
-    "quote_lot_size" / Int64ul,
-    "min_price_multiplier" / Int64ul,
-    "max_price_multiplier" / Int64ul,
-    "system_decimal_value" / Int64ul,
-    "min_separate_numerator" / Int64ul,
-    "min_separate_denominator" / Int64ul,
-    "trade_fee_numerator" / Int64ul,
-    "trade_fee_denominator" / Int64ul,
-    "pnl_numerator" / Int64ul,
-    "pnl_denominator" / Int64ul,
-    "swap_fee_numerator" / Int64ul,
-    "swap_fee_denominator" / Int64ul,
-    "base_need_take_pnl" / Int64ul,
-    "quote_need_take_pnl" / Int64ul,
-    "quote_total_pnl" / Int64ul,
-    "base_total_pnl" / Int64ul,
-    "pool_open_time" / Int64ul,
-    "punish_pc_amount" / Int64ul,
-    "punish_coin_amount" / Int64ul,
-    "orderbook_to_init_time" / Int64ul,
-    "swap_base_in_amount" / Int64ul,
-    "swap_quote_out_amount" / Int64ul,
-    "swap_base2_quote_fee" / Int64ul,
-    "swap_quote_in_amount" / Int64ul,
-    "swap_base_out_amount" / Int64ul,
-    "swap_quote2_base_fee" / Int64ul,
-    "base_vault" / Bytes(32),
-    "quote_vault" / Bytes(32),
-    "base_mint" / Bytes(32),
-    "quote_mint" / Bytes(32),
-    "lp_mint" / Bytes(32),
-    "open_orders" / Bytes(32),
-    "market_id" / Bytes(32),
-    "market_program_id" / Bytes(32),
-    "target_orders" / Bytes(32),
-    "withdraw_queue" / Bytes(32),
-    "lp_vault" / Bytes(32),
-    "owner" / Bytes(32),
-    Padding(32),  # lpReserve
-    Padding(8 * 3),  # padding
-)
+# Layout del Pool State V4 de Raydium: 38 u64 + 12 pubkeys + lpReserve(32) + padding(24)
+_POOL_V4 = struct.Struct("<38Q" + "32s" * 12 + "32x24x")
+RAYDIUM_POOL_V4_SIZE = _POOL_V4.size
+
+PoolV4 = namedtuple("PoolV4", [
+    "status", "nonce", "max_order", "depth", "base_decimal", "quote_decimal",
+    "state", "reset_flag", "min_size", "vol_max_cut_ratio", "amount_wave_ratio",
+    "base_lot_size", "quote_lot_size", "min_price_multiplier", "max_price_multiplier",
+    "system_decimal_value", "min_separate_numerator", "min_separate_denominator",
+    "trade_fee_numerator", "trade_fee_denominator", "pnl_numerator", "pnl_denominator",
+    "swap_fee_numerator", "swap_fee_denominator", "base_need_take_pnl",
+    "quote_need_take_pnl", "quote_total_pnl", "base_total_pnl", "pool_open_time",
+    "punish_pc_amount", "punish_coin_amount", "orderbook_to_init_time",
+    "swap_base_in_amount", "swap_quote_out_amount", "swap_base2_quote_fee",
+    "swap_quote_in_amount", "swap_base_out_amount", "swap_quote2_base_fee",
+    "base_vault", "quote_vault", "base_mint", "quote_mint", "lp_mint", "open_orders",
+    "market_id", "market_program_id", "target_orders", "withdraw_queue", "lp_vault", "owner",
+])
+
+def parse_pool_v4(data: bytes) -> PoolV4:
+    """Parsear el Pool State V4 completo con un solo unpack (pubkeys como bytes de 32)"""
+    if len(data) < RAYDIUM_POOL_V4_SIZE:
+        raise ValueError(f"Pool data demasiado corta: {len(data)} bytes")
+    return PoolV4._make(_POOL_V4.unpack_from(data, 0))
+
+# SPL Token Account: mint(32) + owner(32) + amount(u64)
+SPL_AMOUNT_OFF = 64
+
+# 1 / 10**decimals precalculado (multiplicar en vez de pow + división)
+_DEC_RECIP = [1.0 / (10 ** i) for i in range(19)]
+
+# Límite de pubkeys por getMultipleAccounts (RPC de Solana)
+MAX_MULTIPLE_ACCOUNTS = 100
+
+def _ui_amount(account_data: bytes, decimals: int) -> float:
+    """Amount (u64) de una SPL token account ajustado por decimales"""
+    amount = int.from_bytes(memoryview(account_data)[SPL_AMOUNT_OFF:SPL_AMOUNT_OFF + 8], "little")
+    if decimals < len(_DEC_RECIP):
+        return amount * _DEC_RECIP[decimals]
+    return amount / (10 ** decimals)
+
+# Cache de snapshots de pool (precio + liquidez)
+POOL_SNAPSHOT_TTL = 1.5  # Default, configurable con PRICE_CACHE_TTL
+POOL_SNAPSHOT_CACHE_MAX = 1024
+
+class PoolSnapshot(NamedTuple):
+    price_in_sol: float
+    liquidity_sol: float
+    base_reserve: float
+    quote_reserve: float
+
+# Precio SOL/USD: oráculo Pyth on-chain (primario) + CoinGecko (respaldo)
+PYTH_SOL_USD_ACCOUNT = "H6ARHf6YXhGYeQfUzQNGk6rDNnLBQKrenN712K4AQJEG"
+PYTH_MAGIC = 0xA1B2C3D4
+PYTH_EXPO_OFF = 20
+PYTH_TIMESTAMP_OFF = 96
+PYTH_AGG_PRICE_OFF = 208
+PYTH_AGG_STATUS_OFF = 224
+PYTH_STATUS_TRADING = 1
+PYTH_MAX_AGE = 60  # Segundos antes de considerar el precio Pyth viejo
+SOL_PRICE_REFRESH_INTERVAL = 30
+SOL_PRICE_CACHE_TTL = 120
+COINGECKO_TIMEOUT = aiohttp.ClientTimeout(total=5)
+
+def _parse_pyth_price(data: bytes) -> Optional[Tuple[float, int]]:
+    """Retorna (precio, unix timestamp) de una cuenta de precio Pyth v2, o None si no está en trading"""
+    view = memoryview(data)  # Slices sin copiar la cuenta (~3 KB)
+    if len(view) < PYTH_AGG_STATUS_OFF + 4 or int.from_bytes(view[0:4], "little") != PYTH_MAGIC:
+        return None
+    if int.from_bytes(view[PYTH_AGG_STATUS_OFF:PYTH_AGG_STATUS_OFF + 4], "little") != PYTH_STATUS_TRADING:
+        return None
+    expo = int.from_bytes(view[PYTH_EXPO_OFF:PYTH_EXPO_OFF + 4], "little", signed=True)
+    price = int.from_bytes(view[PYTH_AGG_PRICE_OFF:PYTH_AGG_PRICE_OFF + 8], "little", signed=True)
+    timestamp = int.from_bytes(view[PYTH_TIMESTAMP_OFF:PYTH_TIMESTAMP_OFF + 8], "little", signed=True)
+    return price * 10.0 ** expo, timestamp
+
+
+# SOL mint como string y como 32 bytes crudos (comparación sin base58)
+SOL_MINT = "So11111111111111111111111111111111111111112"
+SOL_MINT_BYTES = bytes(to_pubkey(SOL_MINT))
 
 class PriceCalculator:
     """Calculador de precios desde la blockchain"""
@@ -80,8 +111,16 @@ class PriceCalculator:
         self.sol_price_cache = None
         self.sol_price_timestamp = 0
         
+        # Refresco del precio de SOL en background (ver start())
+        self._sol_price_task: Optional[asyncio.Task] = None
+        
+        # LRU pool_address -> (monotonic ts, PoolSnapshot)
+        self.price_ttl = float(os.getenv('PRICE_CACHE_TTL', str(POOL_SNAPSHOT_TTL)))
+        self._snapshot_cache: "OrderedDict[str, Tuple[float, PoolSnapshot]]" = OrderedDict()
+        self._inflight: Dict[str, asyncio.Task] = {}
+        
         # SOL mint address
-        self.SOL_MINT = "So11111111111111111111111111111111111111112"
+        self.SOL_MINT = SOL_MINT
     
     async def get_token_price_usd(
         self, 
@@ -99,22 +138,28 @@ class PriceCalculator:
             Precio en USD o None si falla
         """
         try:
-            # 1. Obtener precio en SOL
-            price_in_sol = await self.get_token_price_in_sol(pool_address, token_mint)
+            # 1. Precio de SOL en USD (si está en cache no hace falta otro await)
+            sol_price_usd = self._cached_sol_price()
+            
+            # 2. Obtener precio en SOL (en paralelo con el precio de SOL si no hay cache)
+            if sol_price_usd is None:
+                price_in_sol, sol_price_usd = await asyncio.gather(
+                    self.get_token_price_in_sol(pool_address, token_mint),
+                    self.get_sol_price_usd()
+                )
+            else:
+                price_in_sol = await self.get_token_price_in_sol(pool_address, token_mint)
             
             if not price_in_sol or price_in_sol <= 0:
                 return None
             
-            # 2. Obtener precio de SOL en USD
-            sol_price_usd = await self.get_sol_price_usd()
-            
             if not sol_price_usd:
                 return None
             
             # 3. Calcular precio final
             price_usd = price_in_sol * sol_price_usd
             
-            logger.debug(f"💰 {token_mint[:8]}: {price_in_sol:.10f} SOL = ${price_usd:.10f}")
+            logger.debug("💰 %s: %.10f SOL = $%.10f", token_mint[:8], price_in_sol, price_usd)
             
             return price_usd
             
@@ -132,181 +177,354 @@ class PriceCalculator:
         
         Precio = Reserva_SOL / Reserva_Token
         """
+        snapshot = await self.get_pool_snapshot(pool_address)
+        return snapshot.price_in_sol if snapshot else None
+    
+    async def get_pool_snapshot(self, pool_address: str) -> Optional[PoolSnapshot]:
+        """
+        Precio y liquidez de un pool en una sola pasada
+        (pool account + vaults en getMultipleAccounts), cacheado price_ttl segundos
+        """
+        snapshot = self._fresh_snapshot(pool_address)
+        if snapshot is not None:
+            return snapshot
+        
+        # Singleflight: llamadas concurrentes al mismo pool comparten un solo fetch
+        inflight = self._inflight.get(pool_address)
+        if inflight is None:
+            inflight = asyncio.create_task(self._fetch_pool_snapshot(pool_address))
+            self._inflight[pool_address] = inflight
+            inflight.add_done_callback(lambda _: self._inflight.pop(pool_address, None))
+        
+        # shield: si un caller se cancela, el fetch sigue para los demás
+        return await asyncio.shield(inflight)
+    
+    async def _fetch_pool_snapshot(self, pool_address: str) -> Optional[PoolSnapshot]:
+        """Pool account + vaults -> PoolSnapshot (y guardarlo en cache)"""
         try:
-            client = self.rpc_pool.get_client()
-            pool_pubkey = Pubkey.from_string(pool_address)
-            
             # Obtener datos de la cuenta del pool
-            account_info = await client.get_account_info(pool_pubkey)
-            await client.close()
+            async with self.rpc_pool.acquire() as client:
+                account_info = await client.get_account_info(to_pubkey(pool_address))
             
             if not account_info.value or not account_info.value.data:
                 logger.warning(f"⚠️ Pool account not found: {pool_address[:8]}")
                 return None
             
-            # Parsear los datos binarios usando el layout
-            pool_data = RAYDIUM_POOL_V4_LAYOUT.parse(account_info.value.data)
-            
-            # Extraer vaults
-            base_vault_pubkey = Pubkey(pool_data.base_vault)
-            quote_vault_pubkey = Pubkey(pool_data.quote_vault)
+            # Parsear el pool (vaults, mints y decimales en un solo unpack)
+            pool = parse_pool_v4(account_info.value.data)
             
-            # Obtener balances
-            base_info, quote_info = await asyncio.gather(
-                self._get_token_account_balance(str(base_vault_pubkey)),
-                self._get_token_account_balance(str(quote_vault_pubkey))
+            # Obtener balances (ambos vaults en un solo getMultipleAccounts)
+            balances = await self._get_vault_balances(
+                Pubkey(pool.base_vault), Pubkey(pool.quote_vault),
+                pool.base_decimal, pool.quote_decimal
             )
             
-            if not base_info or not quote_info:
-                return None
-            
-            base_reserve = base_info['amount']
-            quote_reserve = quote_info['amount']
-            
-            base_decimals = base_info['decimals']
-            quote_decimals = quote_info['decimals']
-            
-            # Ajustar por decimales
-            base_reserve_adjusted = base_reserve / (10 ** base_decimals)
-            quote_reserve_adjusted = quote_reserve / (10 ** quote_decimals)
-            
-            if base_reserve_adjusted == 0 or quote_reserve_adjusted == 0:
+            if not balances:
                 return None
             
-            # Determinar cuál es SOL y cuál es el token
-            base_mint = str(Pubkey(pool_data.base_mint))
-            quote_mint = str(Pubkey(pool_data.quote_mint))
-            
-            if base_mint == self.SOL_MINT:
-                # SOL es base, token es quote
-                price_in_sol = base_reserve_adjusted / quote_reserve_adjusted
-            elif quote_mint == self.SOL_MINT:
-                # Token es base, SOL es quote
-                price_in_sol = quote_reserve_adjusted / base_reserve_adjusted
-            else:
-                # Ninguno es SOL - no podemos calcular directamente
-                logger.warning(f"⚠️ Pool no tiene SOL: {base_mint[:8]} / {quote_mint[:8]}")
-                return None
-            
-            return price_in_sol
+            base_info, quote_info = balances
+            snapshot = self._build_snapshot(pool, base_info['ui_amount'], quote_info['ui_amount'])
+            if snapshot:
+                self._store_snapshot(pool_address, snapshot)
+            return snapshot
             
         except Exception as e:
-            logger.error(f"Error obteniendo precio en SOL: {e}")
+            logger.error(f"Error obteniendo snapshot del pool: {e}")
+            return None
+    
+    def _build_snapshot(
+        self,
+        pool: PoolV4,
+        base_reserve: float,
+        quote_reserve: float
+    ) -> Optional[PoolSnapshot]:
+        """Calcular precio y liquidez a partir de las reservas (ya ajustadas por decimales)"""
+        if base_reserve == 0 or quote_reserve == 0:
             return None
+        
+        # Determinar cuál es SOL y cuál es el token (comparación de bytes, sin base58)
+        # En pools nuevos SOL casi siempre es el quote: se chequea primero
+        if pool.quote_mint == SOL_MINT_BYTES:
+            # Token es base, SOL es quote
+            sol_reserve, token_reserve = quote_reserve, base_reserve
+        elif pool.base_mint == SOL_MINT_BYTES:
+            # SOL es base, token es quote
+            sol_reserve, token_reserve = base_reserve, quote_reserve
+        else:
+            # Ninguno es SOL - no podemos calcular directamente
+            base_mint = str(Pubkey(pool.base_mint))
+            quote_mint = str(Pubkey(pool.quote_mint))
+            logger.warning(f"⚠️ Pool no tiene SOL: {base_mint[:8]} / {quote_mint[:8]}")
+            return None
+        
+        return PoolSnapshot(
+            price_in_sol=sol_reserve / token_reserve,
+            liquidity_sol=2 * sol_reserve,  # Pool 50/50
+            base_reserve=base_reserve,
+            quote_reserve=quote_reserve
+        )
+    
+    def _store_snapshot(self, pool_address: str, snapshot: PoolSnapshot):
+        self._snapshot_cache[pool_address] = (time.monotonic(), snapshot)
+        if len(self._snapshot_cache) > POOL_SNAPSHOT_CACHE_MAX:
+            self._snapshot_cache.popitem(last=False)
     
-    async def _get_token_account_balance(self, account_address: str) -> Optional[Dict]:
-        """Obtener balance de una token account"""
+    def _fresh_snapshot(self, pool_address: str) -> Optional[PoolSnapshot]:
+        """Snapshot en cache si todavía es fresco"""
+        cached = self._snapshot_cache.get(pool_address)
+        if cached:
+            if time.monotonic() - cached[0] < self.price_ttl:
+                self._snapshot_cache.move_to_end(pool_address)
+                return cached[1]
+            del self._snapshot_cache[pool_address]
+        return None
+    
+    async def get_pool_snapshots(self, pool_addresses: List[str]) -> Dict[str, Optional[PoolSnapshot]]:
+        """
+        Snapshots de varios pools con 2 llamadas getMultipleAccounts en total
+        (pools, luego todos sus vaults) en vez de 2 RPCs por pool
+        """
+        snapshots: Dict[str, Optional[PoolSnapshot]] = {}
+        missing = []
+        for pool_address in dict.fromkeys(pool_addresses):
+            snapshot = self._fresh_snapshot(pool_address)
+            snapshots[pool_address] = snapshot
+            if snapshot is None:
+                missing.append(pool_address)
+        
+        if not missing:
+            return snapshots
+        
         try:
-            client = self.rpc_pool.get_client()
-            pubkey = Pubkey.from_string(account_address)
+            pool_accounts = await self._get_multiple_accounts([to_pubkey(addr) for addr in missing])
+            
+            pools = []
+            vaults = []
+            for pool_address, account in zip(missing, pool_accounts):
+                if account is None or len(account.data) < RAYDIUM_POOL_V4_SIZE:
+                    # Cuenta inexistente o que no es un pool V4: no tirar el resto del lote
+                    logger.debug("⚠️ Cuenta no es un pool V4 válido: %s", pool_address[:8])
+                    continue
+                pool = parse_pool_v4(account.data)
+                pools.append((pool_address, pool))
+                vaults.append(Pubkey(pool.base_vault))
+                vaults.append(Pubkey(pool.quote_vault))
+            
+            vault_accounts = await self._get_multiple_accounts(vaults)
+            
+            for i, (pool_address, pool) in enumerate(pools):
+                base_account, quote_account = vault_accounts[2 * i], vault_accounts[2 * i + 1]
+                if base_account is None or quote_account is None:
+                    continue
+                snapshot = self._build_snapshot(
+                    pool,
+                    _ui_amount(base_account.data, pool.base_decimal),
+                    _ui_amount(quote_account.data, pool.quote_decimal)
+                )
+                if snapshot:
+                    self._store_snapshot(pool_address, snapshot)
+                snapshots[pool_address] = snapshot
             
-            balance_info = await client.get_token_account_balance(pubkey)
-            await client.close()
+        except Exception as e:
+            logger.error(f"Error obteniendo snapshots de pools: {e}")
+        
+        return snapshots
+    
+    async def get_many_prices(
+        self,
+        pool_addresses: List[str],
+        token_mints: List[str]
+    ) -> List[Optional[float]]:
+        """
+        Precios en USD para varios pools en un solo batch (para el monitor de posiciones)
+        
+        Returns:
+            Lista alineada con pool_addresses (None donde no se pudo calcular)
+        """
+        snapshots, sol_price_usd = await asyncio.gather(
+            self.get_pool_snapshots(pool_addresses),
+            self.get_sol_price_usd()
+        )
+        
+        prices: List[Optional[float]] = []
+        for pool_address, token_mint in zip(pool_addresses, token_mints):
+            snapshot = snapshots.get(pool_address)
+            if not snapshot or snapshot.price_in_sol <= 0 or not sol_price_usd:
+                prices.append(None)
+                continue
+            price_usd = snapshot.price_in_sol * sol_price_usd
+            logger.debug("💰 %s: %.10f SOL = $%.10f", token_mint[:8], snapshot.price_in_sol, price_usd)
+            prices.append(price_usd)
+        
+        return prices
+    
+    async def _get_multiple_accounts(self, pubkeys: List[Pubkey]) -> List:
+        """getMultipleAccounts en bloques de MAX_MULTIPLE_ACCOUNTS (orden preservado)"""
+        if not pubkeys:
+            return []
+        
+        chunks = [
+            pubkeys[i:i + MAX_MULTIPLE_ACCOUNTS]
+            for i in range(0, len(pubkeys), MAX_MULTIPLE_ACCOUNTS)
+        ]
+        async with self.rpc_pool.acquire() as client:
+            responses = await asyncio.gather(*[client.get_multiple_accounts(chunk) for chunk in chunks])
+        
+        accounts = []
+        for resp in responses:
+            accounts.extend(resp.value)
+        return accounts
+    
+    async def _get_vault_balances(
+        self,
+        base_vault: Pubkey,
+        quote_vault: Pubkey,
+        base_decimals: int,
+        quote_decimals: int
+    ) -> Optional[Tuple[Dict, Dict]]:
+        """Obtener balances de los dos vaults del pool en una sola llamada RPC"""
+        try:
+            async with self.rpc_pool.acquire() as client:
+                resp = await client.get_multiple_accounts([base_vault, quote_vault])
             
-            if not balance_info.value:
+            accounts = resp.value
+            if len(accounts) != 2 or accounts[0] is None or accounts[1] is None:
                 return None
             
-            return {
-                'amount': int(balance_info.value.amount),
-                'decimals': balance_info.value.decimals,
-                'ui_amount': float(balance_info.value.ui_amount or 0)
-            }
+            return (
+                {'decimals': base_decimals, 'ui_amount': _ui_amount(accounts[0].data, base_decimals)},
+                {'decimals': quote_decimals, 'ui_amount': _ui_amount(accounts[1].data, quote_decimals)}
+            )
             
         except Exception as e:
-            logger.debug(f"Error getting balance: {e}")
+            logger.debug("Error getting balances: %s", e)
             return None
     
+    async def start(self):
+        """Iniciar el refresco del precio de SOL en background"""
+        self._ensure_sol_price_task()
+    
+    def _ensure_sol_price_task(self):
+        """Lanzar el refresco en background si no está corriendo (requiere event loop)"""
+        if self._sol_price_task is None or self._sol_price_task.done():
+            self._sol_price_task = asyncio.create_task(self._refresh_sol_price_loop())
+    
+    async def close(self):
+        """
+        Detener el refresco y liberar caches (llamar al apagar el bot)
+        La sesión HTTP compartida la cierra main.py (close_http_session)
+        """
+        if self._sol_price_task is not None:
+            self._sol_price_task.cancel()
+            self._sol_price_task = None
+        for task in list(self._inflight.values()):
+            task.cancel()
+        self._inflight.clear()
+        self._snapshot_cache.clear()
+    
+    async def _refresh_sol_price_loop(self):
+        """Mantener sol_price_cache fresco sin tocar la red en el camino caliente"""
+        while True:
+            try:
+                await self._refresh_sol_price()
+            except Exception as e:
+                logger.warning(f"Error refrescando precio de SOL: {e}")
+            await asyncio.sleep(SOL_PRICE_REFRESH_INTERVAL)
+    
     async def get_sol_price_usd(self) -> Optional[float]:
         """
         Obtener precio de SOL en USD
-        Usa cache de 60 segundos para no hacer demasiadas llamadas
+        La primera llamada arranca el refresco en background (como start());
+        desde ahí es solo una lectura de cache salvo que el cache se venza
         """
-        import aiohttp
+        self._ensure_sol_price_task()
+        cached = self._cached_sol_price()
+        if cached is not None:
+            return cached
         
-        # Usar cache si tiene menos de 60 segundos
-        if self.sol_price_cache and (time.time() - self.sol_price_timestamp) < 60:
+        return await self._refresh_sol_price()
+    
+    def _cached_sol_price(self) -> Optional[float]:
+        """Precio de SOL en cache si todavía es fresco"""
+        if self.sol_price_cache and (time.monotonic() - self.sol_price_timestamp) < SOL_PRICE_CACHE_TTL:
             return self.sol_price_cache
+        return None
+    
+    async def _refresh_sol_price(self) -> Optional[float]:
+        """Actualizar el cache: Pyth primero, CoinGecko si Pyth falla o está viejo"""
+        sol_price = await self._get_pyth_sol_price()
+        if sol_price is None:
+            logger.debug("Pyth SOL/USD no disponible, usando CoinGecko")
+            sol_price = await self._get_coingecko_sol_price()
         
-        try:
-            # Usar CoinGecko API gratuita (sin API key necesaria)
-            url = "https://api.coingecko.com/api/v3/simple/price"
-            params = {
-                "ids": "solana",
-                "vs_currencies": "usd"
-            }
-            
-            async with aiohttp.ClientSession() as session:
-                async with session.get(url, params=params, timeout=5) as resp:
-                    if resp.status == 200:
-                        data = await resp.json()
-                        sol_price = data.get("solana", {}).get("usd")
-                        
-                        if sol_price:
-                            self.sol_price_cache = float(sol_price)
-                            self.sol_price_timestamp = time.time()
-                            logger.debug(f"💵 SOL Price: ${sol_price:.2f}")
-                            return sol_price
-            
-            # Fallback: usar precio fijo conservador
+        if sol_price is None:
+            # Stale-while-revalidate: un precio viejo es mejor que uno inventado
+            if self.sol_price_cache:
+                age = time.monotonic() - self.sol_price_timestamp
+                logger.warning(f"⚠️ No se pudo refrescar precio de SOL, usando cache de {age:.0f}s")
+                return self.sol_price_cache
+            
+            # Fallback: usar precio fijo conservador (solo si nunca hubo precio)
             logger.warning("⚠️ No se pudo obtener precio de SOL, usando fallback: $150")
             return 150.0
-            
-        except Exception as e:
-            logger.warning(f"Error obteniendo precio de SOL: {e}, usando fallback")
-            return 150.0
+        
+        self.sol_price_cache = sol_price
+        self.sol_price_timestamp = time.monotonic()
+        logger.debug("💵 SOL Price: $%.2f", sol_price)
+        return sol_price
     
-    async def get_pool_liquidity_sol(self, pool_address: str) -> Optional[float]:
-        """
-        Calcular liquidez total del pool en SOL
-        """
+    async def _get_pyth_sol_price(self) -> Optional[float]:
+        """Leer SOL/USD del oráculo Pyth vía el RPC pool (sin HTTP externo)"""
         try:
-            client = self.rpc_pool.get_client()
-            pool_pubkey = Pubkey.from_string(pool_address)
-            
-            account_info = await client.get_account_info(pool_pubkey)
-            await client.close()
+            async with self.rpc_pool.acquire() as client:
+                account_info = await client.get_account_info(to_pubkey(PYTH_SOL_USD_ACCOUNT))
             
             if not account_info.value or not account_info.value.data:
                 return None
             
-            # CORREGIDO: Se eliminó el punto extra después de account_info.value
-            pool_data = RAYDIUM_POOL_V4_LAYOUT.parse(account_info.value.data)
-            
-            # Extraer vaults
-            base_vault_pubkey = Pubkey(pool_data.base_vault)
-            quote_vault_pubkey = Pubkey(pool_data.quote_vault)
-            
-            # Obtener balances
-            base_info, quote_info = await asyncio.gather(
-                self._get_token_account_balance(str(base_vault_pubkey)),
-                self._get_token_account_balance(str(quote_vault_pubkey))
-            )
-            
-            if not base_info or not quote_info:
+            parsed = _parse_pyth_price(account_info.value.data)
+            if parsed is None:
                 return None
             
-            base_reserve = base_info['ui_amount']
-            quote_reserve = quote_info['ui_amount']
-            
-            if base_reserve == 0 or quote_reserve == 0:
+            price, publish_time = parsed
+            if price <= 0 or time.time() - publish_time > PYTH_MAX_AGE:
+                logger.debug("Precio Pyth de SOL viejo o inválido (publicado hace %.0fs)", time.time() - publish_time)
                 return None
             
-            # Determinar cuál es SOL
-            base_mint = str(Pubkey(pool_data.base_mint))
-            quote_mint = str(Pubkey(pool_data.quote_mint))
+            return price
             
-            if base_mint == self.SOL_MINT:
-                # Liquidez en SOL = 2 * reserva de SOL (porque es 50/50)
-                liquidity_sol = 2 * base_reserve
-            elif quote_mint == self.SOL_MINT:
-                # Liquidez en SOL = 2 * reserva de SOL
-                liquidity_sol = 2 * quote_reserve
-            else:
-                # Pool no contiene SOL
-                return None
+        except Exception as e:
+            logger.debug("Error leyendo Pyth SOL/USD: %s", e)
+            return None
+    
+    async def _get_coingecko_sol_price(self) -> Optional[float]:
+        """Precio de SOL desde CoinGecko (respaldo, rate limit ~30 req/min)"""
+        try:
+            # Usar CoinGecko API gratuita (sin API key necesaria)
+            url = "https://api.coingecko.com/api/v3/simple/price"
+            params = {
+                "ids": "solana",
+                "vs_currencies": "usd"
+            }
             
-            return liquidity_sol
+            session = get_http_session()
+            async with session.get(url, params=params, timeout=COINGECKO_TIMEOUT) as resp:
+                if resp.status == 200:
+                    data = orjson.loads(await resp.read())
+                    sol_price = data.get("solana", {}).get("usd")
+                    
+                    if sol_price:
+                        return float(sol_price)
+            
+            return None
             
         except Exception as e:
-            logger.error(f"Error calculando liquidez: {e}")
+            logger.warning(f"Error obteniendo precio de SOL de CoinGecko: {e}")
             return None
+    
+    async def get_pool_liquidity_sol(self, pool_address: str) -> Optional[float]:
+        """
+        Calcular liquidez total del pool en SOL
+        """
+        snapshot = await self.get_pool_snapshot(pool_address)
+        return snapshot.liquidity_sol if snapshot else None
@@ -0,0 +1,16 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+🔑 PUBKEYS - Cache de Pubkey decodificados
+==========================================
+✅ Pubkey.from_string (base58) una sola vez por dirección
+✅ Compartido por RugChecker, PriceCalculator, etc.
+"""
+
+import functools
+from solders.pubkey import Pubkey
+
+@functools.lru_cache(maxsize=4096)
+def to_pubkey(address: str) -> Pubkey:
+    """Pubkey.from_string memoizado (mints/pools/vaults se consultan una y otra vez)"""
+    return Pubkey.from_string(address)
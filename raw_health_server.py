@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+⚡ RAW HEALTH SERVER - Respondedor HTTP mínimo sobre asyncio
+============================================================
+✅ Sin FastAPI/Starlette/uvicorn en el camino de cada probe
+✅ Mismos payloads que health_server (render_*)
+✅ Se activa con HEALTH_SERVER_BACKEND=raw
+"""
+
+import asyncio
+import logging
+from contextlib import suppress
+from typing import Callable, Dict
+
+from health_server import (
+    bot_status,
+    invalidate_payload_cache,
+    render_health,
+    render_ping,
+    render_root,
+    render_stats,
+    render_status,
+)
+
+logger = logging.getLogger(__name__)
+
+KEEP_ALIVE_TIMEOUT = 75  # Igual que timeout_keep_alive de uvicorn
+MAX_HEADER_BYTES = 8192
+
+ROUTES: Dict[bytes, Callable[[], bytes]] = {
+    b"/": render_root,
+    b"/health": render_health,
+    b"/status": render_status,
+    b"/stats": render_stats,
+    b"/ping": render_ping,
+}
+
+_RESPONSE_HEAD = (
+    b"HTTP/1.1 %s\r\n"
+    b"Content-Type: application/json\r\n"
+    b"Content-Length: %d\r\n"
+    b"Connection: %s\r\n\r\n"
+)
+_NOT_FOUND_BODY = b'{"detail":"Not Found"}'
+
+
+def _render(path: bytes) -> tuple:
+    """Retorna (status_line, body) para un path"""
+    render = ROUTES.get(path)
+    if render is None:
+        return b"404 Not Found", _NOT_FOUND_BODY
+    return b"200 OK", render()
+
+
+def _content_length(headers: bytes) -> int:
+    """Content-Length de los headers (ya en minúsculas): 0 si falta, -1 si es inválido"""
+    block = b"\r\n" + headers
+    start = block.find(b"\r\ncontent-length:")
+    if start < 0:
+        return 0
+    start += 17
+    end = block.find(b"\r\n", start)
+    value = block[start:end if end >= 0 else None].strip()
+    return int(value) if value.isdigit() else -1
+
+
+async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+    """Atender una conexión (soporta keep-alive)"""
+    try:
+        while True:
+            try:
+                head = await asyncio.wait_for(
+                    reader.readuntil(b"\r\n\r\n"),
+                    timeout=KEEP_ALIVE_TIMEOUT
+                )
+            except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, asyncio.TimeoutError):
+                break
+
+            request_line, _, headers = head.partition(b"\r\n")
+            parts = request_line.split(b" ", 2)
+            if len(parts) < 3:
+                break
+
+            method = parts[0]
+            path = parts[1].split(b"?", 1)[0]
+            headers = headers.lower()
+            keep_alive = (
+                parts[2].startswith(b"HTTP/1.1")
+                and b"connection: close" not in headers
+            )
+
+            # Solo GET/HEAD siguen en keep-alive: un body sin leer se parsearía
+            # como el siguiente request. GET con body: se descarta si es chico
+            if method not in (b"GET", b"HEAD") or b"transfer-encoding:" in headers:
+                keep_alive = False
+            else:
+                body_length = _content_length(headers)
+                if body_length < 0 or body_length > MAX_HEADER_BYTES:
+                    keep_alive = False
+                elif body_length > 0:
+                    try:
+                        await reader.readexactly(body_length)
+                    except asyncio.IncompleteReadError:
+                        break
+
+            status, body = _render(path)
+            connection = b"keep-alive" if keep_alive else b"close"
+            response = _RESPONSE_HEAD % (status, len(body), connection)
+            if method != b"HEAD":
+                response += body
+            writer.write(response)
+            await writer.drain()
+
+            if not keep_alive:
+                break
+
+    except ConnectionError:
+        pass
+    except Exception as e:
+        logger.debug(f"Error en conexión health raw: {e}")
+    finally:
+        writer.close()
+        with suppress(Exception):
+            await writer.wait_closed()
+
+
+async def serve_raw_health(port: int):
+    """Servir health checks hasta que la tarea sea cancelada"""
+    server = await asyncio.start_server(
+        handle,
+        host="0.0.0.0",
+        port=port,
+        backlog=2048,
+        limit=MAX_HEADER_BYTES
+    )
+    bot_status.mode = "ready"
+    invalidate_payload_cache()
+    logger.info(f"⚡ Raw health server escuchando en 0.0.0.0:{port}")
+
+    async with server:
+        await server.serve_forever()
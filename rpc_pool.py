@@ -7,23 +7,81 @@ Gestiona múltiples RPCs gratuitos para evitar límites
 """
 
 import os
+import time
 import random
+import itertools
 import asyncio
 import logging
-from typing import List, Optional
+import importlib.util
+from contextlib import asynccontextmanager, suppress
+from typing import AsyncIterator, Dict, List, Optional
+import httpx
+from solana.exceptions import SolanaRpcException
 from solana.rpc.async_api import AsyncClient
 from solana.rpc.commitment import Confirmed, Processed
 
 logger = logging.getLogger(__name__)
 
+# HTTP/2 (multiplexa las llamadas concurrentes sobre una sola conexión TLS)
+# Requiere el paquete h2; sin él se queda en HTTP/1.1
+HTTP2_ENABLED = (
+    os.getenv('RPC_HTTP2', 'true').lower() == 'true'
+    and importlib.util.find_spec('h2') is not None
+)
+RPC_HTTP_LIMITS = httpx.Limits(max_connections=32, max_keepalive_connections=32)
+RPC_HTTP_TIMEOUT = 10.0
+
+# Circuit breaker: tras N fallos seguidos el RPC sale de rotación durante X segundos
+CIRCUIT_FAILURE_THRESHOLD = 5
+CIRCUIT_OPEN_SECONDS = 30.0
+
+# Errores transitorios que merecen reintento con otro proveedor
+RETRYABLE_ERRORS = (asyncio.TimeoutError, httpx.HTTPError, SolanaRpcException)
+
+# Health check de RPCs
+HEALTH_PROBE_TIMEOUT = 5.0
+HEALTH_CHECK_INTERVAL = 60.0
+
+class PooledAsyncClient(AsyncClient):
+    """
+    AsyncClient de vida larga compartido por el pool
+    close() es no-op: el cierre real lo hace RPCPool.close_all()
+    """
+    
+    def __init__(self, endpoint: str, **kwargs):
+        super().__init__(endpoint, **kwargs)
+        if HTTP2_ENABLED:
+            # La sesión por defecto del provider aún no abrió conexiones
+            self._provider.session = httpx.AsyncClient(
+                http2=True,
+                limits=RPC_HTTP_LIMITS,
+                timeout=RPC_HTTP_TIMEOUT
+            )
+    
+    async def close(self) -> None:
+        pass
+    
+    async def _shutdown(self) -> None:
+        await super().close()
+
 class RPCPool:
     """Pool de múltiples RPCs con balanceo de carga"""
     
     def __init__(self):
         self.rpc_urls = self._load_rpc_urls()
-        self.current_index = 0
+        self._rr_counter = itertools.count()
         self.health_status = {url: True for url in self.rpc_urls}
         
+        # Estado del circuit breaker por URL
+        self._failures: Dict[str, int] = {url: 0 for url in self.rpc_urls}
+        self._opened_at: Dict[str, float] = {}
+        
+        # Re-verificación periódica (ver start_health_monitor)
+        self._health_task: Optional[asyncio.Task] = None
+        
+        # Un cliente persistente por URL (conexiones keep-alive reutilizadas)
+        self._clients: Dict[str, PooledAsyncClient] = {}
+        
         if not self.rpc_urls:
             raise ValueError("❌ No se encontraron URLs de RPC en variables de entorno")
         
@@ -55,26 +113,65 @@ class RPCPool:
         
         return urls
     
-    def get_client(self, random_selection: bool = True) -> AsyncClient:
+    def get_client(self) -> AsyncClient:
         """
         Obtener un cliente RPC del pool
         
-        Args:
-            random_selection: Si True, selecciona aleatoriamente. Si False, usa round-robin
+        Round-robin determinista sobre los RPCs saludables: una ráfaga de
+        llamadas concurrentes se reparte entre proveedores en vez de caer
+        varias veces en el mismo (como podía pasar con random.choice)
         """
-        if random_selection:
-            # Selección aleatoria para distribuir mejor la carga
-            url = random.choice(self.rpc_urls)
-        else:
-            # Round-robin (uno tras otro)
-            url = self.rpc_urls[self.current_index]
-            self.current_index = (self.current_index + 1) % len(self.rpc_urls)
-        
-        return AsyncClient(url, commitment=Confirmed)
+        return self._client_for(self._next_url())
+    
+    def _next_url(self) -> str:
+        """Siguiente URL en el round-robin (todas si ninguna está saludable)"""
+        if self._health_task is None:
+            # Primer uso del pool: arrancar la re-verificación periódica
+            self.start_health_monitor()
+        urls = self.get_healthy_urls() or self.rpc_urls
+        return urls[next(self._rr_counter) % len(urls)]
+    
+    @asynccontextmanager
+    async def acquire(self) -> AsyncIterator[AsyncClient]:
+        """
+        Usar un cliente del pool: `async with pool.acquire() as client:`
+        El cliente sigue vivo al salir (no se cierra la conexión)
+        """
+        yield self.get_client()
+    
+    def _client_for(self, url: str) -> AsyncClient:
+        """Cliente persistente para una URL (se crea al primer uso)"""
+        client = self._clients.get(url)
+        if client is None:
+            client = PooledAsyncClient(url, commitment=Confirmed)
+            self._clients[url] = client
+        return client
     
     def get_all_clients(self) -> List[AsyncClient]:
         """Obtener un cliente para cada RPC (para operaciones paralelas)"""
-        return [AsyncClient(url, commitment=Confirmed) for url in self.rpc_urls]
+        return [self._client_for(url) for url in self.rpc_urls]
+    
+    async def close_all(self):
+        """Cerrar todos los clientes del pool (llamar al apagar el bot)"""
+        if self._health_task is not None:
+            health_task, self._health_task = self._health_task, None
+            health_task.cancel()
+            # Esperar a que termine antes de cerrar los clientes que está probando
+            with suppress(asyncio.CancelledError):
+                await health_task
+        clients = list(self._clients.values())
+        self._clients.clear()
+        results = await asyncio.gather(
+            *(client._shutdown() for client in clients),
+            return_exceptions=True
+        )
+        for result in results:
+            if isinstance(result, Exception):
+                logger.debug(f"Error cerrando cliente RPC: {result}")
+    
+    async def close(self):
+        """Alias de close_all() para el shutdown del bot"""
+        await self.close_all()
     
     async def parallel_call(self, method_name: str, *args, **kwargs):
         """
@@ -83,28 +180,92 @@ class RPCPool:
         """
         clients = self.get_all_clients()
         
-        async def call_rpc(client: AsyncClient, idx: int):
-            try:
-                method = getattr(client, method_name)
-                result = await method(*args, **kwargs)
-                return (idx, result, None)
-            except Exception as e:
-                return (idx, None, e)
-            finally:
-                await client.close()
+        async def call_rpc(client: AsyncClient):
+            method = getattr(client, method_name)
+            return await method(*args, **kwargs)
         
         # Lanzar todas las llamadas en paralelo
-        tasks = [call_rpc(client, idx) for idx, client in enumerate(clients)]
-        results = await asyncio.gather(*tasks, return_exceptions=True)
+        pending = {asyncio.create_task(call_rpc(client)) for client in clients}
         
-        # Retornar el primer resultado exitoso
-        for idx, result, error in results:
-            if result is not None and error is None:
-                return result
+        try:
+            # Retornar el primer resultado exitoso (sin esperar al RPC más lento)
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                result = None
+                for task in done:
+                    # Recuperar la excepción de cada tarea terminada (evita
+                    # "exception was never retrieved" en las que fallaron)
+                    if task.cancelled() or task.exception() is not None:
+                        continue
+                    if result is None:
+                        result = task.result()
+                if result is not None:
+                    return result
+        finally:
+            # Cancelar las llamadas perdedoras (los clientes del pool siguen vivos)
+            for task in pending:
+                task.cancel()
         
-        # Si todos fallaron, lanzar el último error
+        # Si todos fallaron
         raise Exception(f"Todas las llamadas a {method_name} fallaron")
     
+    async def call_with_retry(
+        self,
+        method_name: str,
+        *args,
+        retries: int = 3,
+        base_delay: float = 0.1,
+        timeout: float = 2.0,
+        **kwargs
+    ):
+        """
+        Ejecutar una llamada RPC con reintentos y backoff exponencial
+        Cada intento usa el siguiente proveedor del round-robin, así un
+        429/5xx transitorio de un RPC no hace fallar la llamada
+        """
+        if retries < 1:
+            raise ValueError("retries debe ser >= 1")
+        
+        last_error: Optional[BaseException] = None
+        
+        for attempt in range(retries):
+            url = self._next_url()
+            method = getattr(self._client_for(url), method_name)
+            
+            try:
+                result = await asyncio.wait_for(method(*args, **kwargs), timeout=timeout)
+            except RETRYABLE_ERRORS as e:
+                last_error = e
+                self._record_failure(url)
+                if attempt + 1 < retries:
+                    await asyncio.sleep(base_delay * 2 ** attempt + random.uniform(0, 0.05))
+                continue
+            
+            self._record_success(url)
+            return result
+        
+        raise last_error
+    
+    def _record_failure(self, url: str):
+        """Contar un fallo; abrir el circuito si se alcanza el umbral"""
+        failures = self._failures.get(url, 0) + 1
+        self._failures[url] = failures
+        now = time.monotonic()
+        # Circuito cerrado o half-open (ventana vencida): un fallo más lo (re)abre
+        if failures >= CIRCUIT_FAILURE_THRESHOLD and not self._circuit_open(url, now):
+            self._opened_at[url] = now
+            logger.warning(f"⚡ Circuito abierto para RPC ({failures} fallos): {url[:50]}...")
+    
+    def _record_success(self, url: str):
+        """Cerrar el circuito tras una llamada exitosa"""
+        self._failures[url] = 0
+        self._opened_at.pop(url, None)
+    
+    def _circuit_open(self, url: str, now: float) -> bool:
+        """True si el RPC está fuera de rotación (pasado el tiempo vuelve a probarse)"""
+        opened_at = self._opened_at.get(url)
+        return opened_at is not None and now - opened_at < CIRCUIT_OPEN_SECONDS
+    
     def mark_unhealthy(self, url: str):
         """Marcar un RPC como no saludable temporalmente"""
         if url in self.health_status:
@@ -112,32 +273,56 @@ class RPCPool:
             logger.warning(f"⚠️ RPC marcado como unhealthy: {url[:50]}...")
     
     def get_healthy_urls(self) -> List[str]:
-        """Obtener solo las URLs saludables"""
-        return [url for url, healthy in self.health_status.items() if healthy]
+        """Obtener solo las URLs saludables (y con el circuito cerrado)"""
+        now = time.monotonic()
+        return [
+            url for url, healthy in self.health_status.items()
+            if healthy and not self._circuit_open(url, now)
+        ]
     
     async def health_check(self):
-        """Verificar salud de todos los RPCs"""
+        """Verificar salud de todos los RPCs (en paralelo)"""
         logger.info("🏥 Verificando salud de RPCs...")
         
-        for url in self.rpc_urls:
-            try:
-                client = AsyncClient(url, commitment=Confirmed)
-                # Intentar obtener la versión (llamada ligera)
-                version = await asyncio.wait_for(client.get_version(), timeout=5.0)
-                
-                if version:
-                    self.health_status[url] = True
-                    provider = url.split('//')[1].split('.')[0]
-                    logger.info(f"  ✓ {provider}: OK")
-                else:
-                    self.health_status[url] = False
-                
-                await client.close()
-                
-            except Exception as e:
-                self.health_status[url] = False
-                provider = url.split('//')[1].split('.')[0] if '//' in url else 'unknown'
-                logger.warning(f"  ✗ {provider}: FAIL ({str(e)[:50]})")
+        await asyncio.gather(*(self._probe(url) for url in self.rpc_urls))
         
         healthy_count = sum(1 for h in self.health_status.values() if h)
         logger.info(f"✅ RPCs saludables: {healthy_count}/{len(self.rpc_urls)}")
+    
+    async def _probe(self, url: str):
+        """Verificar un RPC con get_version (llamada ligera) sobre su cliente persistente"""
+        provider = url.split('//')[1].split('.')[0] if '//' in url else 'unknown'
+        try:
+            version = await asyncio.wait_for(self._client_for(url).get_version(), timeout=HEALTH_PROBE_TIMEOUT)
+        except Exception as e:
+            self.health_status[url] = False
+            logger.warning(f"  ✗ {provider}: FAIL ({str(e)[:50]})")
+            return
+        
+        if version:
+            self.health_status[url] = True
+            # Un RPC recuperado vuelve a la rotación
+            self._record_success(url)
+            logger.info(f"  ✓ {provider}: OK")
+        else:
+            self.health_status[url] = False
+    
+    def start_health_monitor(self):
+        """
+        Lanzar la re-verificación periódica de RPCs
+        Se llama sola en el primer get_client()/acquire(); fuera de un event loop no hace nada
+        """
+        if self._health_task is None or self._health_task.done():
+            try:
+                self._health_task = asyncio.get_running_loop().create_task(self._periodic_health())
+            except RuntimeError:
+                pass
+    
+    async def _periodic_health(self):
+        """Re-verificar la salud de los RPCs cada HEALTH_CHECK_INTERVAL segundos"""
+        while True:
+            await asyncio.sleep(HEALTH_CHECK_INTERVAL)
+            try:
+                await self.health_check()
+            except Exception as e:
+                logger.debug(f"Error en health check periódico: {e}")
@@ -7,15 +7,41 @@
 """
 
 import os
+import time
 import asyncio
 import logging
+from collections import OrderedDict
 from typing import Dict, Tuple, Optional
 from dataclasses import dataclass
 from solders.pubkey import Pubkey
+from pubkeys import to_pubkey
 from rpc_pool import RPCPool
 
 logger = logging.getLogger(__name__)
 
+# Cache de supply por mint (rara vez cambia dentro de una sesión)
+SUPPLY_CACHE_TTL = 300.0
+SUPPLY_CACHE_MAX = 2048
+
+# Layout SPL Mint (82 bytes): mint_authority COption<Pubkey> (4+32), supply u64,
+# decimals u8, is_initialized u8 (byte 45), freeze_authority COption<Pubkey> (4+32)
+MINT_AUTHORITY_TAG_OFF = 0
+FREEZE_AUTHORITY_TAG_OFF = 46
+
+def _coption_is_some(data: bytes, offset: int) -> bool:
+    """True si el COption que empieza en offset tiene valor (tag u32 LE != 0)"""
+    if len(data) < offset + 4:
+        return False
+    return int.from_bytes(data[offset:offset + 4], "little") != 0
+
+# Mints con mint y freeze authority renunciadas (estado permanente on-chain)
+RENOUNCED_CACHE_MAX = 4096
+
+# Historial del creador: más de N tx en 24h = posible spammer
+# Las firmas vienen de la más nueva a la más vieja, con N+1 alcanza para decidir
+CREATOR_MAX_RECENT_TX = 10
+CREATOR_SIGNATURES_LIMIT = CREATOR_MAX_RECENT_TX + 1
+
 @dataclass
 class RugCheckResult:
     """Resultado de los checks de seguridad"""
@@ -37,16 +63,25 @@ class RugChecker:
         self.rpc_pool = rpc_pool
         self.min_liquidity_sol = float(os.getenv('MIN_LIQUIDITY_SOL', '5.0'))
         self.max_holder_percent = float(os.getenv('MAX_HOLDER_PERCENT', '40.0'))
+        
+        # mint -> (timestamp monotonic, supply)
+        self._supply_cache: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+        # Mints ya verificados con ambas autoridades renunciadas (no requieren RPC)
+        self._renounced_mints: "OrderedDict[str, None]" = OrderedDict()
     
     async def check_token_safety(
         self, 
         token_mint: str, 
         creator_address: Optional[str] = None,
-        liquidity_sol: Optional[float] = None
+        liquidity_sol: Optional[float] = None,
+        total_supply: Optional[float] = None
     ) -> RugCheckResult:
         """
         Ejecutar todos los checks de seguridad en paralelo
         
+        Args:
+            total_supply: Supply ya conocido (ui amount); si se pasa, se evita get_token_supply
+        
         Returns:
             RugCheckResult con el veredicto final
         """
@@ -58,15 +93,19 @@ class RugChecker:
         
         try:
             # Lanzar todos los checks en paralelo
-            results = await asyncio.gather(
-                self._check_mint_authority(token_mint),
-                self._check_freeze_authority(token_mint),
-                self._check_holder_distribution(token_mint),
+            # (mint y freeze authority comparten una sola llamada RPC)
+            authorities, *other_results = await asyncio.gather(
+                self._check_authorities(token_mint),
+                self._check_holder_distribution(token_mint, total_supply),
                 self._check_liquidity(liquidity_sol),
                 self._check_creator_history(creator_address) if creator_address else self._skip_check("creator_history"),
                 return_exceptions=True
             )
             
+            if isinstance(authorities, Exception):
+                authorities = (authorities, authorities)
+            results = [*authorities, *other_results]
+            
             # Procesar resultados
             check_names = [
                 "mint_authority",
@@ -127,87 +166,92 @@ class RugChecker:
                 details={"error": str(e)}
             )
     
-    async def _check_mint_authority(self, mint_address: str) -> Dict:
-        """Check 1: Verificar que no puedan crear más tokens"""
+    async def _check_authorities(self, mint_address: str) -> Tuple[Dict, Dict]:
+        """
+        Checks 1 y 2: mint authority y freeze authority
+        Una sola get_account_info para la cuenta mint (ambos bytes están en el mismo buffer)
+        
+        Returns:
+            (resultado mint_authority, resultado freeze_authority)
+        """
+        if mint_address in self._renounced_mints:
+            return (
+                {"passed": True, "reason": "Mint authority renounced ✓"},
+                {"passed": True, "reason": "Freeze authority renounced ✓"}
+            )
+        
         try:
-            client = self.rpc_pool.get_client()
-            pubkey = Pubkey.from_string(mint_address)
-            
-            account_info = await client.get_account_info(pubkey)
-            await client.close()
+            account_info = await self.rpc_pool.call_with_retry(
+                'get_account_info', to_pubkey(mint_address)
+            )
             
             if not account_info.value:
-                return {"passed": False, "reason": "Token account not found"}
+                not_found = {"passed": False, "reason": "Token account not found"}
+                return not_found, dict(not_found)
             
             # Parsear los datos de la cuenta mint
             data = account_info.value.data
             
-            # En Solana, el byte 0 indica si hay mint_authority
-            # Si es 0, no hay autoridad (bueno). Si es 1, hay autoridad (malo)
-            has_mint_authority = data[0] == 1 if len(data) > 0 else False
+            # Tag u32 del COption: 0 = sin autoridad (bueno), 1 = hay autoridad (malo)
+            has_mint_authority = _coption_is_some(data, MINT_AUTHORITY_TAG_OFF)
+            has_freeze_authority = _coption_is_some(data, FREEZE_AUTHORITY_TAG_OFF)
             
             if has_mint_authority:
-                return {
+                mint_result = {
                     "passed": False,
                     "reason": "Mint authority not renounced (can create infinite tokens)"
                 }
-            
-            return {
-                "passed": True,
-                "reason": "Mint authority renounced ✓"
-            }
-            
-        except Exception as e:
-            return {"passed": False, "reason": f"Error: {str(e)[:50]}"}
-    
-    async def _check_freeze_authority(self, mint_address: str) -> Dict:
-        """Check 2: Verificar que no puedan congelar tokens"""
-        try:
-            client = self.rpc_pool.get_client()
-            pubkey = Pubkey.from_string(mint_address)
-            
-            account_info = await client.get_account_info(pubkey)
-            await client.close()
-            
-            if not account_info.value:
-                return {"passed": False, "reason": "Token account not found"}
-            
-            data = account_info.value.data
-            
-            # Byte 45 indica freeze authority
-            has_freeze_authority = data[45] == 1 if len(data) > 45 else False
+            else:
+                mint_result = {
+                    "passed": True,
+                    "reason": "Mint authority renounced ✓"
+                }
             
             if has_freeze_authority:
-                return {
+                freeze_result = {
                     "passed": False,
                     "reason": "Freeze authority not renounced (can freeze tokens)"
                 }
+            else:
+                freeze_result = {
+                    "passed": True,
+                    "reason": "Freeze authority renounced ✓"
+                }
             
-            return {
-                "passed": True,
-                "reason": "Freeze authority renounced ✓"
-            }
+            # Renunciar es irreversible: no hace falta volver a consultar este mint
+            if not has_mint_authority and not has_freeze_authority:
+                self._renounced_mints[mint_address] = None
+                if len(self._renounced_mints) > RENOUNCED_CACHE_MAX:
+                    self._renounced_mints.popitem(last=False)
+            
+            return mint_result, freeze_result
             
         except Exception as e:
-            return {"passed": False, "reason": f"Error: {str(e)[:50]}"}
+            error = {"passed": False, "reason": f"Error: {str(e)[:50]}"}
+            return error, dict(error)
     
-    async def _check_holder_distribution(self, mint_address: str) -> Dict:
+    async def _check_holder_distribution(
+        self,
+        mint_address: str,
+        total_supply: Optional[float] = None
+    ) -> Dict:
         """Check 3: Verificar que el creador no tenga demasiados tokens"""
         try:
-            client = self.rpc_pool.get_client()
-            pubkey = Pubkey.from_string(mint_address)
-            
-            # Obtener las cuentas más grandes
-            largest = await client.get_token_largest_accounts(pubkey)
-            await client.close()
+            pubkey = to_pubkey(mint_address)
+            
+            if total_supply is None:
+                # Cuentas más grandes y supply total en paralelo (supply desde cache si es reciente)
+                largest, total_supply = await asyncio.gather(
+                    self.rpc_pool.call_with_retry('get_token_largest_accounts', pubkey),
+                    self._cached_supply(mint_address, pubkey)
+                )
+            else:
+                largest = await self.rpc_pool.call_with_retry('get_token_largest_accounts', pubkey)
             
             if not largest.value or len(largest.value) == 0:
                 return {"passed": False, "reason": "No holders found"}
             
-            # Obtener supply total
-            supply_info = await self.rpc_pool.get_client().get_token_supply(pubkey)
-            total_supply = float(supply_info.value.ui_amount or 0)
-            
+            # Supply total (pedido arriba o ya conocido por el caller)
             if total_supply == 0:
                 return {"passed": False, "reason": "Total supply is 0"}
             
@@ -230,6 +274,26 @@ class RugChecker:
         except Exception as e:
             return {"passed": False, "reason": f"Error: {str(e)[:50]}"}
     
+    async def _cached_supply(self, mint_address: str, pubkey: Pubkey) -> float:
+        """Supply total del mint (ui amount), con cache TTL"""
+        cached = self._supply_cache.get(mint_address)
+        if cached:
+            if time.monotonic() - cached[0] < SUPPLY_CACHE_TTL:
+                self._supply_cache.move_to_end(mint_address)
+                return cached[1]
+            del self._supply_cache[mint_address]
+        
+        supply_info = await self.rpc_pool.call_with_retry('get_token_supply', pubkey)
+        total_supply = float(supply_info.value.ui_amount or 0)
+        
+        # Supply 0 probablemente es un mint aún no inicializado: no cachear
+        if total_supply > 0:
+            self._supply_cache[mint_address] = (time.monotonic(), total_supply)
+            if len(self._supply_cache) > SUPPLY_CACHE_MAX:
+                self._supply_cache.popitem(last=False)
+        
+        return total_supply
+    
     async def _check_liquidity(self, liquidity_sol: Optional[float]) -> Dict:
         """Check 4: Verificar liquidez mínima"""
         try:
@@ -257,12 +321,10 @@ class RugChecker:
             if not creator_address:
                 return {"passed": True, "reason": "Creator check skipped"}
             
-            client = self.rpc_pool.get_client()
-            pubkey = Pubkey.from_string(creator_address)
-            
-            # Obtener últimas transacciones
-            sigs = await client.get_signatures_for_address(pubkey, limit=20)
-            await client.close()
+            # Obtener últimas transacciones (solo las necesarias para las reglas de abajo)
+            sigs = await self.rpc_pool.call_with_retry(
+                'get_signatures_for_address', to_pubkey(creator_address), limit=CREATOR_SIGNATURES_LIMIT
+            )
             
             if not sigs.value or len(sigs.value) < 3:
                 # Wallet muy nueva o sin actividad - sospechoso
@@ -272,10 +334,10 @@ class RugChecker:
                 }
             
             # Contar cuántas transacciones son muy recientes (últimas 24h)
-            import time
-            recent_count = sum(1 for sig in sigs.value if sig.block_time and (time.time() - sig.block_time) < 86400)
+            threshold = time.time() - 86400
+            recent_count = sum(1 for sig in sigs.value if sig.block_time and sig.block_time > threshold)
             
-            if recent_count > 10:
+            if recent_count > CREATOR_MAX_RECENT_TX:
                 # Demasiada actividad en 24h - posible spammer
                 return {
                     "passed": False,